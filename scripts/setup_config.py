@@ -92,24 +92,26 @@ def main() -> None:
     if ENV_PATH.exists():
         load_dotenv(dotenv_path=ENV_PATH, override=False)
         print(f"Found existing {ENV_PATH}. Values will be used as defaults.\n")
+    # Snapshot once; every default below reads from this dict
+    env = dict(os.environ)
 
     # Gather values
-    influx_url = prompt("InfluxDB URL", os.getenv("INFLUX_URL", "http://localhost:8086"))
-    influx_org = prompt("InfluxDB Org", os.getenv("INFLUX_ORG", ""))
-    influx_token = prompt("InfluxDB Token", os.getenv("INFLUX_TOKEN", ""), secret=True)
-    influx_bucket = prompt("InfluxDB Bucket", os.getenv("INFLUX_BUCKET", "clashprobe"))
-
-    time_range = prompt("Time range minutes", os.getenv("TIME_RANGE_MINUTES", "5"))
-    poll_interval = prompt("Poll interval seconds", os.getenv("POLL_INTERVAL_SECONDS", "30"))
-    latency_warn = prompt("Latency warn ms (optional)", os.getenv("LATENCY_WARN_MS", ""))
-
-    tg_token = prompt("Telegram Bot Token", os.getenv("TELEGRAM_BOT_TOKEN", ""), secret=True)
-    chat_id = prompt("Telegram Chat ID (optional)", os.getenv("TELEGRAM_CHAT_ID", ""))
-    msg_id = prompt("Telegram Message ID (optional)", os.getenv("TELEGRAM_MESSAGE_ID", ""))
-
-    status_title = prompt("Status title", os.getenv("STATUS_TITLE", "Network Status"))
-    show_protocol = prompt("Show protocol (true/false)", os.getenv("SHOW_PROTOCOL", "true"))
-    tz = prompt("Timezone (display)", os.getenv("TZ", "UTC"))
+    influx_url = prompt("InfluxDB URL", env.get("INFLUX_URL", "http://localhost:8086"))
+    influx_org = prompt("InfluxDB Org", env.get("INFLUX_ORG", ""))
+    influx_token = prompt("InfluxDB Token", env.get("INFLUX_TOKEN", ""), secret=True)
+    influx_bucket = prompt("InfluxDB Bucket", env.get("INFLUX_BUCKET", "clashprobe"))
+
+    time_range = prompt("Time range minutes", env.get("TIME_RANGE_MINUTES", "5"))
+    poll_interval = prompt("Poll interval seconds", env.get("POLL_INTERVAL_SECONDS", "30"))
+    latency_warn = prompt("Latency warn ms (optional)", env.get("LATENCY_WARN_MS", ""))
+
+    tg_token = prompt("Telegram Bot Token", env.get("TELEGRAM_BOT_TOKEN", ""), secret=True)
+    chat_id = prompt("Telegram Chat ID (optional)", env.get("TELEGRAM_CHAT_ID", ""))
+    msg_id = prompt("Telegram Message ID (optional)", env.get("TELEGRAM_MESSAGE_ID", ""))
+
+    status_title = prompt("Status title", env.get("STATUS_TITLE", "Network Status"))
+    show_protocol = prompt("Show protocol (true/false)", env.get("SHOW_PROTOCOL", "true"))
+    tz = prompt("Timezone (display)", env.get("TZ", "UTC"))
 
     data = {
         "INFLUX_URL": influx_url,
@@ -1,3 +1,4 @@
+import functools
 import os
 from dataclasses import dataclass
 from typing import Optional
@@ -11,9 +12,12 @@ class Config:
     influx_token: str
     influx_org: str
     influx_bucket: str = "clashprobe"
+    influx_use_pandas: bool = False
 
     time_range_minutes: int = 5
     poll_interval_seconds: int = 30
+    # Upper bound for backing off while nothing changes; equal to the interval = no backoff
+    poll_max_interval_seconds: int = 30
     latency_warn_ms: Optional[int] = None
 
     telegram_bot_token: str = ""
@@ -36,14 +40,20 @@ def _to_bool(val: Optional[str], default: bool) -> bool:
     return val.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
+@functools.lru_cache(maxsize=1)
 def load_config() -> Config:
-    # Load .env if present
+    """Parse configuration from the environment once; later calls reuse the result.
+
+    Tests that tweak the environment should call ``load_config.cache_clear()``.
+    """
+    # Load .env if present, then snapshot the environment once
     load_dotenv(override=False)
+    env = dict(os.environ)
 
     missing = []
-    influx_url = os.getenv("INFLUX_URL") or ""
-    influx_token = os.getenv("INFLUX_TOKEN") or ""
-    influx_org = os.getenv("INFLUX_ORG") or ""
+    influx_url = env.get("INFLUX_URL") or ""
+    influx_token = env.get("INFLUX_TOKEN") or ""
+    influx_org = env.get("INFLUX_ORG") or ""
 
     if not influx_url:
         missing.append("INFLUX_URL")
@@ -52,10 +62,11 @@ def load_config() -> Config:
     if not influx_org:
         missing.append("INFLUX_ORG")
 
-    influx_bucket = os.getenv("INFLUX_BUCKET", "clashprobe")
+    influx_bucket = env.get("INFLUX_BUCKET", "clashprobe")
+    influx_use_pandas = _to_bool(env.get("INFLUX_USE_PANDAS"), False)
 
     def _int_env(name: str, default: int) -> int:
-        raw = os.getenv(name)
+        raw = env.get(name)
         if raw is None or raw.strip() == "":
             return default
         try:
@@ -68,8 +79,11 @@ def load_config() -> Config:
 
     time_range_minutes = _int_env("TIME_RANGE_MINUTES", 5)
     poll_interval_seconds = _int_env("POLL_INTERVAL_SECONDS", 30)
+    poll_max_interval_seconds = _int_env("POLL_MAX_INTERVAL_SECONDS", poll_interval_seconds)
+    if poll_max_interval_seconds < poll_interval_seconds:
+        raise ValueError("POLL_MAX_INTERVAL_SECONDS must be >= POLL_INTERVAL_SECONDS")
 
-    latency_warn_raw = os.getenv("LATENCY_WARN_MS")
+    latency_warn_raw = env.get("LATENCY_WARN_MS")
     latency_warn_ms = None
     if latency_warn_raw and latency_warn_raw.strip() != "":
         try:
@@ -79,14 +93,14 @@ def load_config() -> Config:
         except Exception:
             raise ValueError(f"Invalid integer for LATENCY_WARN_MS: {latency_warn_raw}")
 
-    telegram_bot_token = os.getenv(
+    telegram_bot_token = env.get(
         "TELEGRAM_BOT_TOKEN"
     ) or ""
     if not telegram_bot_token:
         missing.append("TELEGRAM_BOT_TOKEN")
 
     def _opt_int(name: str) -> Optional[int]:
-        raw = os.getenv(name)
+        raw = env.get(name)
         if raw is None or raw.strip() == "":
             return None
         try:
@@ -97,15 +111,15 @@ def load_config() -> Config:
     telegram_chat_id = _opt_int("TELEGRAM_CHAT_ID")
     telegram_message_id = _opt_int("TELEGRAM_MESSAGE_ID")
 
-    status_title = os.getenv("STATUS_TITLE", "Network Status")
-    show_protocol = _to_bool(os.getenv("SHOW_PROTOCOL"), True)
-    status_template = os.getenv("STATUS_TEMPLATE", "default").strip().lower() or "default"
+    status_title = env.get("STATUS_TITLE", "Network Status")
+    show_protocol = _to_bool(env.get("SHOW_PROTOCOL"), True)
+    status_template = env.get("STATUS_TEMPLATE", "default").strip().lower() or "default"
     if status_template not in {"default", "board_zh"}:
         raise ValueError("Invalid STATUS_TEMPLATE; use 'default' or 'board_zh'")
 
-    domestic_probe_node = os.getenv("DOMESTIC_PROBE_NODE") or None
-    foreign_probe_node = os.getenv("FOREIGN_PROBE_NODE") or None
-    include_degraded_as_alert = _to_bool(os.getenv("INCLUDE_DEGRADED_AS_ALERT"), True)
+    domestic_probe_node = env.get("DOMESTIC_PROBE_NODE") or None
+    foreign_probe_node = env.get("FOREIGN_PROBE_NODE") or None
+    include_degraded_as_alert = _to_bool(env.get("INCLUDE_DEGRADED_AS_ALERT"), True)
 
     if missing:
         raise RuntimeError(
@@ -117,8 +131,10 @@ def load_config() -> Config:
         influx_token=influx_token,
         influx_org=influx_org,
         influx_bucket=influx_bucket,
+        influx_use_pandas=influx_use_pandas,
         time_range_minutes=time_range_minutes,
         poll_interval_seconds=poll_interval_seconds,
+        poll_max_interval_seconds=poll_max_interval_seconds,
         latency_warn_ms=latency_warn_ms,
         telegram_bot_token=telegram_bot_token,
         telegram_chat_id=telegram_chat_id,
@@ -1,17 +1,41 @@
 from __future__ import annotations
 
+import functools
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 
 from influxdb_client import InfluxDBClient
 
 
 logger = logging.getLogger(__name__)
 
+# Flux text is built from fixed templates and memoized, so every poll sends a
+# byte-identical query for the same settings.
+_FLUX_TEMPLATE = """
+from(bucket: "{bucket}")
+  |> range(start: -{minutes}m)
+  |> filter(fn: (r) => r["_measurement"] == "probe")
+{node_filter}
+  |> filter(fn: (r) =>
+    r["_field"] == "alive" or r["_field"] == "delay_ms"
+  )
+  |> group(columns: [{group_columns}"name", "_field"])
+  |> sort(columns: ["_time"])
+  |> last()
+  |> keep(columns: ["_time", "_value", "_field", {group_columns}"name", "protocol"])
+"""
+_NODE_FILTER_TEMPLATE = '  |> filter(fn: (r) => r["node"] == "{probe_node}")\n'
+# Several probe nodes in one query: rows stay grouped by node so they can be split
+_MULTI_NODE_FILTER_TEMPLATE = '  |> filter(fn: (r) => contains(value: r["node"], set: [{nodes}]))\n'
+_NODE_GROUP_COLUMN = '"node", '
+
+# (connect, read) timeouts in ms so a slow InfluxDB cannot stall a cycle indefinitely
+_TIMEOUT_MS = (5_000, 10_000)
 
-@dataclass
+
+@dataclass(slots=True)
 class NodePoint:
     alive: Optional[bool]
     latency_ms: Optional[int]
@@ -25,81 +49,167 @@ class NodePoint:
         return max(times) if times else None
 
 
+@functools.lru_cache(maxsize=8)
+def _build_flux(bucket: str, minutes: int, probe_node: Optional[str]) -> str:
+    node_filter = _NODE_FILTER_TEMPLATE.format(probe_node=probe_node) if probe_node else ""
+    return _FLUX_TEMPLATE.format(
+        bucket=bucket, minutes=minutes, node_filter=node_filter, group_columns=""
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _build_multi_flux(bucket: str, minutes: int, probe_nodes: Tuple[str, ...]) -> str:
+    nodes = ", ".join(f'"{n}"' for n in probe_nodes)
+    return _FLUX_TEMPLATE.format(
+        bucket=bucket,
+        minutes=minutes,
+        node_filter=_MULTI_NODE_FILTER_TEMPLATE.format(nodes=nodes),
+        group_columns=_NODE_GROUP_COLUMN,
+    )
+
+
+def create_client(url: str, token: str, org: str, *, pool_size: int = 10) -> InfluxDBClient:
+    """Build the long-lived client shared by every poll (keep-alive HTTP pool, gzip)."""
+    return InfluxDBClient(
+        url=url,
+        token=token,
+        org=org,
+        enable_gzip=True,
+        timeout=_TIMEOUT_MS,
+        connection_pool_maxsize=pool_size,
+    )
+
+
+def _apply_point(
+    result: Dict[str, NodePoint],
+    name: Optional[str],
+    field: str,
+    value: object,
+    t: datetime,
+    protocol: Optional[str],
+) -> None:
+    if not name:
+        return
+    node = result.get(name)
+    if node is None:
+        node = NodePoint(alive=None, latency_ms=None, alive_time=None, latency_time=None, protocol=protocol)
+        result[name] = node
+
+    # last() leaves a single, most recent row per (name, field)
+    if field == "alive":
+        node.alive = bool(value)
+        node.alive_time = t
+    elif field == "delay_ms":
+        try:
+            node.latency_ms = int(value)
+        except Exception:
+            # ignore non-int values
+            node.latency_ms = None
+        node.latency_time = t
+    else:
+        return
+    # update protocol if present
+    if protocol:
+        node.protocol = protocol
+
+
+# Query results keyed by probe node; a single-node query files everything under None
+_NodeResults = Dict[Optional[str], Dict[str, NodePoint]]
+
+
+def _collect_frame(results: _NodeResults, query_api, flux: str, org: str, split: bool) -> None:
+    import pandas as pd  # optional; only needed with INFLUX_USE_PANDAS
+
+    frames = query_api.query_data_frame(query=flux, org=org)
+    if isinstance(frames, list):
+        if not frames:
+            return
+        frames = pd.concat(frames, ignore_index=True)
+    if frames.empty:
+        return
+
+    # Latest row per ([node,] name, field), computed in pandas rather than per record
+    keys = (["node"] if split else []) + ["name", "_field"]
+    df = frames.sort_values("_time").groupby(keys, sort=False).tail(1)
+    has_protocol = "protocol" in df.columns
+    cols = ["name", "_field", "_value", "_time"] + (["protocol"] if has_protocol else [])
+    cols += ["node"] if split else []
+    for row in df[cols].itertuples(index=False, name=None):
+        result = results.get(row[-1] if split else None)
+        if result is None:
+            continue
+        try:
+            protocol = row[4] if has_protocol else None
+            _apply_point(
+                result,
+                row[0] if isinstance(row[0], str) else None,
+                row[1],
+                row[2],
+                row[3].to_pydatetime(),
+                protocol if isinstance(protocol, str) else None,
+            )
+        except Exception as e:  # per-row robustness
+            logger.warning("Skipping malformed row: %s", e)
+
+
+def _collect(
+    results: _NodeResults,
+    client: InfluxDBClient,
+    flux: str,
+    org: str,
+    *,
+    split: bool,
+    use_dataframe: bool,
+) -> None:
+    query_api = client.query_api()
+    if use_dataframe:
+        _collect_frame(results, query_api, flux, org, split)
+        return
+    # Stream to avoid loading entire result into memory
+    for record in query_api.query_stream(query=flux, org=org):
+        result = results.get(record.values.get("node") if split else None)
+        if result is None:
+            continue
+        try:
+            _apply_point(
+                result,
+                record.values.get("name"),
+                record.get_field(),
+                record.get_value(),
+                record.get_time(),
+                record.values.get("protocol"),
+            )
+        except Exception as e:  # per-record robustness
+            logger.warning("Skipping malformed record: %s", e)
+
+
 def fetch_probe_window(
     *,
-    url: str,
-    token: str,
+    client: InfluxDBClient,
     org: str,
     bucket: str,
     minutes: int,
     probe_node: Optional[str] = None,
+    use_dataframe: bool = False,
 ) -> Dict[str, NodePoint]:
     """
     Query InfluxDB for the last N minutes of probe data and reduce by `name`.
 
+    The reduction happens server-side: `group()` + `last()` return at most one
+    row per (name, field), so the stream below carries only the latest values.
+
+    With `use_dataframe`, results are pulled via `query_data_frame` and reduced
+    with pandas (optional dependency) instead of iterating records in Python.
+
     Returns a mapping: name -> NodePoint (latest alive/delay_ms and their timestamps).
     """
 
-    node_filter = (
-        f'  |> filter(fn: (r) => r["node"] == "{probe_node}")\n' if probe_node else ""
-    )
-
-    flux = f"""
-from(bucket: "{bucket}")
-  |> range(start: -{minutes}m)
-  |> filter(fn: (r) => r["_measurement"] == "probe")
-{node_filter}
-  |> filter(fn: (r) =>
-    r["_field"] == "alive" or r["_field"] == "delay_ms"
-  )
-  |> keep(columns: ["_time", "_value", "_field", "name", "protocol"])
-"""
+    flux = _build_flux(bucket, minutes, probe_node)
 
     result: Dict[str, NodePoint] = {}
     now = datetime.now(timezone.utc)
 
-    client = InfluxDBClient(url=url, token=token, org=org)
-    try:
-        query_api = client.query_api()
-        # Stream to avoid loading entire result into memory
-        for record in query_api.query_stream(query=flux, org=org):
-            try:
-                name = record.values.get("name")
-                if not name:
-                    continue
-                field = record.get_field()
-                value = record.get_value()
-                t: datetime = record.get_time()
-                protocol = record.values.get("protocol")
-
-                node = result.get(name)
-                if node is None:
-                    node = NodePoint(alive=None, latency_ms=None, alive_time=None, latency_time=None, protocol=protocol)
-                    result[name] = node
-
-                if field == "alive":
-                    # pick the most recent alive value
-                    if node.alive_time is None or (t and node.alive_time and t > node.alive_time):
-                        node.alive = bool(value)
-                        node.alive_time = t
-                        # update protocol if present
-                        if protocol:
-                            node.protocol = protocol
-                elif field == "delay_ms":
-                    # pick the most recent latency value
-                    if node.latency_time is None or (t and node.latency_time and t > node.latency_time):
-                        try:
-                            node.latency_ms = int(value)
-                        except Exception:
-                            # ignore non-int values
-                            node.latency_ms = None
-                        node.latency_time = t
-                        if protocol:
-                            node.protocol = protocol
-            except Exception as e:  # per-record robustness
-                logger.warning("Skipping malformed record: %s", e)
-    finally:
-        client.close()
+    _collect({None: result}, client, flux, org, split=False, use_dataframe=use_dataframe)
 
     logger.info(
         "Fetched %d nodes from Influx window=%dm at %s",
@@ -108,3 +218,37 @@ from(bucket: "{bucket}")
         now.isoformat(),
     )
     return result
+
+
+def fetch_probe_window_multi(
+    *,
+    client: InfluxDBClient,
+    org: str,
+    bucket: str,
+    minutes: int,
+    probe_nodes: Sequence[str],
+    use_dataframe: bool = False,
+) -> Dict[str, Dict[str, NodePoint]]:
+    """
+    Like `fetch_probe_window`, for several probe nodes in a single query.
+
+    Rows are filtered with `contains()` and grouped by node as well, then split
+    client-side. Returns a mapping: probe node -> (name -> NodePoint); every
+    requested node is present, empty if it reported nothing in the window.
+    """
+
+    nodes = tuple(dict.fromkeys(probe_nodes))
+    flux = _build_multi_flux(bucket, minutes, nodes)
+
+    results: Dict[str, Dict[str, NodePoint]] = {n: {} for n in nodes}
+    now = datetime.now(timezone.utc)
+
+    _collect(results, client, flux, org, split=True, use_dataframe=use_dataframe)
+
+    logger.info(
+        "Fetched %s nodes from Influx window=%dm at %s",
+        "/".join(str(len(r)) for r in results.values()),
+        minutes,
+        now.isoformat(),
+    )
+    return results
@@ -1,6 +1,8 @@
 """
 Polling → reduce → format → edit loop:
 - On a fixed interval, query InfluxDB for the last N minutes of probe metrics.
+  While nothing changes, the interval doubles per cycle up to
+  POLL_MAX_INTERVAL_SECONDS (off by default), and resets on the first change.
 - Reduce per node name: latest `alive` and `delay_ms` values within the window.
 - Decide status: if `alive` is true and recent ⇒ UP; else DOWN. If a latency
   threshold is provided and `delay_ms` exceeds it, mark as DEGRADED.
@@ -10,8 +12,9 @@ Missing data handling:
 - If a node has no data within the window, treat it as DOWN (dead/unknown).
 
 Hashing to avoid redundant edits:
-- Before editing, compute a SHA-256 hash of the formatted payload. If the hash
-  is unchanged from the previous cycle, skip the edit to respect Telegram rate limits.
+- Before editing, hash the formatted payload (xxh3_64 when `xxhash` is installed,
+  SHA-256 otherwise). If the hash is unchanged from the previous cycle, skip the
+  edit to respect Telegram rate limits.
 
 Failure handling and retries:
 - Each cycle is wrapped with error handling so transient errors do not crash the bot.
@@ -20,15 +23,21 @@ Failure handling and retries:
 
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from telegram.ext import Application
 
-from .config import load_config
-from .state import load_message_ref
+from .config import Config, load_config
 from .telegram_bot import BotState, build_application, update_cycle
 
 
+logger = logging.getLogger(__name__)
+
+# Polling faster than this only churns the event loop; Influx data is coarser anyway
+MIN_POLL_INTERVAL_SECONDS = 5
+
+
 def setup_logging() -> None:
     logging.basicConfig(
         level=logging.INFO,
@@ -36,26 +45,60 @@ def setup_logging() -> None:
     )
 
 
+def next_poll_delay(cfg: Config, state: BotState) -> float:
+    """Seconds until the next cycle: the base interval, doubled per unchanged cycle.
+
+    The base interval is floored at MIN_POLL_INTERVAL_SECONDS and the backoff is
+    capped at POLL_MAX_INTERVAL_SECONDS.
+    """
+    base = max(cfg.poll_interval_seconds, MIN_POLL_INTERVAL_SECONDS)
+    cap = max(cfg.poll_max_interval_seconds, base)
+    return min(base * 2 ** min(state.unchanged_streak, 16), cap)
+
+
+def setup_event_loop() -> None:
+    """Run on uvloop when it is installed; the stock asyncio loop otherwise."""
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed; using the default asyncio loop")
+        return
+    # uvloop's policy makes every loop created through asyncio a uvloop loop, but
+    # unlike the stock policy its get_event_loop() never creates one, and
+    # run_polling() calls asyncio.get_event_loop(); so set a current loop too.
+    uvloop.install()
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
 def main() -> None:
     setup_logging()
+    setup_event_loop()
     cfg = load_config()
+    if cfg.poll_interval_seconds < MIN_POLL_INTERVAL_SECONDS:
+        logger.warning(
+            "POLL_INTERVAL_SECONDS=%s is below the %ss floor; using %ss",
+            cfg.poll_interval_seconds,
+            MIN_POLL_INTERVAL_SECONDS,
+            MIN_POLL_INTERVAL_SECONDS,
+        )
 
-    app: Application = build_application(cfg)
+    # Initial state; build_application loads the persisted message ref if any
+    state = BotState(msg_ref=None, last_hash=None)
 
-    # Initial state: load persisted message ref if any
-    state = BotState(msg_ref=load_message_ref(), last_hash=None)
+    app: Application = build_application(cfg, state)
 
-    # Schedule periodic job
+    # Schedule the poll loop; each cycle schedules the next one
     async def job_callback(context):
-        await update_cycle(cfg, state, context)
+        try:
+            await update_cycle(cfg, state, context)
+        finally:
+            context.job_queue.run_once(job_callback, when=next_poll_delay(cfg, state))
 
     if app.job_queue is None:  # pragma: no cover - runtime check
         raise RuntimeError(
             "JobQueue missing. Install python-telegram-bot[job-queue] to enable scheduling."
         )
-    app.job_queue.run_repeating(
-        job_callback, interval=cfg.poll_interval_seconds, first=0
-    )
+    app.job_queue.run_once(job_callback, when=0)
 
     # Run polling
     app.run_polling()
@@ -1,20 +1,55 @@
 from __future__ import annotations
 
 import hashlib
+import io
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from telegram.helpers import escape_markdown
+try:
+    import xxhash  # optional: much faster than SHA-256 for change detection
+except ImportError:  # pragma: no cover - depends on the environment
+    xxhash = None
 
 from .influx import NodePoint
 
 
 logger = logging.getLogger(__name__)
 
+# Incremental hash object (xxh3_64 or sha256); both support update()/copy()
+Hasher = Any
 
-@dataclass
+# Formatted message bodies (everything above the "Updated" line) and their
+# hash state, keyed by (title, minutes, show_protocol, status fingerprint).
+# Kept tiny on purpose: consecutive polls almost always hit the latest entry.
+_FMT_CACHE: Dict[tuple, Tuple[str, Hasher]] = {}
+_FMT_CACHE_MAX = 2
+
+# MarkdownV2 escaping as a single str.translate pass; same character set as
+# telegram.helpers.escape_markdown(version=2), backslash included.
+_MDV2_TABLE = str.maketrans({c: "\\" + c for c in "\\_*[]()~`>#+-=|{}.!"})
+
+
+def _esc(text: str) -> str:
+    return text.translate(_MDV2_TABLE)
+
+
+_UPD_PREFIX = _esc("Updated: ")
+_DASH = _esc(" — ")
+_MS = _esc(" ms")
+
+_AM = "上午"
+_PM = "下午"
+_CN_UPDATED_PREFIX = _esc("更新日期：")
+_CN_TITLE = _esc("监视公告牌")
+_CN_DOMESTIC_HEADER = _esc("国内当前报警节点如下：")
+_CN_FOREIGN_HEADER = _esc("国外当前报警节点如下：")
+_CN_NONE = _esc("无")
+_CN_NOTE = _esc("如何解读：只要国内国外其中有一个报警即为节点不可用")
+
+
+@dataclass(slots=True)
 class NodeStatus:
     name: str
     up: bool
@@ -25,7 +60,11 @@ class NodeStatus:
 
 
 def reduce_status(
-    data: Dict[str, NodePoint], *, minutes: int, latency_warn_ms: Optional[int]
+    data: Dict[str, NodePoint],
+    *,
+    prev: Optional[Dict[str, NodeStatus]] = None,
+    minutes: int,
+    latency_warn_ms: Optional[int],
 ) -> Dict[str, NodeStatus]:
     """
     Reduce per name according to spec:
@@ -33,147 +72,246 @@ def reduce_status(
     - latency = most recent delay_ms within the window
     - If no data in window => DOWN (unknown/dead)
     - DEGRADED if up and latency > threshold
+
+    If `prev` (the previous cycle's result) is given, it is updated in place and
+    returned: known nodes keep their NodeStatus objects, new names are added and
+    names missing from `data` are dropped.
     """
-    out: Dict[str, NodeStatus] = {}
+    out: Dict[str, NodeStatus] = prev if prev is not None else {}
     for name, node in data.items():
         alive = node.alive
         # Consider data present if either alive or latency seen in window
         has_any = (node.alive_time is not None) or (node.latency_time is not None)
         if not has_any:
-            out[name] = NodeStatus(
-                name=name,
-                up=False,
-                degraded=False,
-                latency_ms=None,
-                reason="no recent heartbeat",
-                protocol=node.protocol,
-            )
-            continue
-
-        if alive is True:
+            up, degraded, latency_ms, reason = False, False, None, "no recent heartbeat"
+        elif alive is True:
             degraded = False
             if latency_warn_ms is not None:
                 if node.latency_ms is not None and node.latency_ms > latency_warn_ms:
                     degraded = True
-            out[name] = NodeStatus(
-                name=name,
-                up=True,
-                degraded=degraded,
-                latency_ms=node.latency_ms,
-                reason=None,
-                protocol=node.protocol,
-            )
+            up, latency_ms, reason = True, node.latency_ms, None
         else:
             # alive False or missing alive -> DOWN
+            up, degraded, latency_ms = False, False, None
             reason = "no recent heartbeat" if alive is None else None
+
+        ns = out.get(name)
+        if ns is None:
             out[name] = NodeStatus(
                 name=name,
-                up=False,
-                degraded=False,
-                latency_ms=None,
+                up=up,
+                degraded=degraded,
+                latency_ms=latency_ms,
                 reason=reason,
                 protocol=node.protocol,
             )
-
+        else:
+            ns.up = up
+            ns.degraded = degraded
+            ns.latency_ms = latency_ms
+            ns.reason = reason
+            ns.protocol = node.protocol
+
+    if len(out) > len(data):
+        for name in [n for n in out if n not in data]:
+            del out[name]
     return out
 
 
-def format_markdown_v2(
+def reduce_input_key(
+    data: Dict[str, NodePoint], *, minutes: int, latency_warn_ms: Optional[int]
+) -> tuple:
+    """Key covering every input `reduce_status` looks at.
+
+    Timestamps only matter as present/absent, so a node that keeps reporting the
+    same values produces the same key from one poll to the next.
+    """
+    return (
+        minutes,
+        latency_warn_ms,
+        tuple(
+            sorted(
+                (
+                    name,
+                    node.alive,
+                    node.latency_ms,
+                    node.alive_time is not None,
+                    node.latency_time is not None,
+                    node.protocol,
+                )
+                for name, node in data.items()
+            )
+        ),
+    )
+
+
+def status_fingerprint(statuses: Dict[str, NodeStatus]) -> tuple:
+    """Cheap, order-independent key describing everything the formatter renders per node."""
+    return tuple(
+        sorted(
+            (s.name, s.up, s.degraded, s.latency_ms, s.reason, s.protocol)
+            for s in statuses.values()
+        )
+    )
+
+
+# Line prefix per display group, indexed by _rank()
+_PREFIX = ("✅ ", "⚠️ ", "❌ ")
+
+
+def _rank(ns: NodeStatus) -> int:
+    """Display group: 0 = UP, 1 = DEGRADED, 2 = DOWN."""
+    return 0 if (ns.up and not ns.degraded) else (1 if ns.up else 2)
+
+
+def _format_body(
     title: str,
     statuses: Dict[str, NodeStatus],
     *,
     minutes: int,
     show_protocol: bool,
-    now: Optional[datetime] = None,
 ) -> str:
-    """Create a compact, stable-ordered MarkdownV2 message."""
-    now = now or datetime.now(timezone.utc)
-    # Group: UP (not degraded), DEGRADED, DOWN; alpha by name within each
-    ups: List[NodeStatus] = []
-    degs: List[NodeStatus] = []
-    downs: List[NodeStatus] = []
-    for s in statuses.values():
-        if s.up and not s.degraded:
-            ups.append(s)
-        elif s.up and s.degraded:
-            degs.append(s)
-        else:
-            downs.append(s)
-
-    def key(ns: NodeStatus) -> str:
-        return ns.name.lower()
-
-    ups.sort(key=key)
-    degs.sort(key=key)
-    downs.sort(key=key)
+    # Group: UP (not degraded), DEGRADED, DOWN; alpha by name within each.
+    # One decorated sort; the index keeps ties stable and never compares statuses.
+    ordered = sorted(
+        (_rank(s), s.name.lower(), i, s) for i, s in enumerate(statuses.values())
+    )
 
-    lines: List[str] = []
-    safe_title = escape_markdown(f"{title} (last {minutes}m)", version=2)
-    lines.append(f"*{safe_title}*")
-    lines.append("")
+    buf = io.StringIO()
+    safe_title = _esc(f"{title} (last {minutes}m)")
+    buf.write(f"*{safe_title}*\n\n")
 
     def fmt(ns: NodeStatus) -> str:
-        if ns.up:
-            if ns.degraded:
-                emoji = "⚠️"
-            else:
-                emoji = "✅"
-        else:
-            emoji = "❌"
-
-        name = escape_markdown(ns.name, version=2)
+        name = _esc(ns.name)
         tail: str
         # Wrap protocol in escaped parentheses for MarkdownV2 safety
         proto = (
-            f" \\({escape_markdown(ns.protocol, version=2)}\\)" if (show_protocol and ns.protocol) else ""
+            f" \\({_esc(ns.protocol)}\\)" if (show_protocol and ns.protocol) else ""
         )
         if ns.up:
             if ns.latency_ms is not None:
-                tail = f" — {ns.latency_ms} ms"
+                # Digits need no escaping; only a (bogus) negative sign would
+                latency = str(ns.latency_ms)
+                if ns.latency_ms < 0:
+                    latency = _esc(latency)
+                tail = f"{_DASH}{latency}{_MS}"
             else:
                 tail = ""
         else:
             if ns.reason:
-                # Build raw; escape once at final join
-                tail = f" — {ns.reason}"
+                tail = _DASH + _esc(ns.reason)
             else:
                 tail = ""
 
-        return f"{emoji} {name}{proto}{escape_markdown(tail, version=2)}"
+        return f"{name}{proto}{tail}"
 
-    for group in (ups, degs, downs):
-        for item in group:
-            lines.append(fmt(item))
+    for rank, _, _, item in ordered:
+        buf.write(_PREFIX[rank])
+        buf.write(fmt(item))
+        buf.write("\n")
+
+    # Trailing blank line; the caller appends the "Updated" line after it
+    buf.write("\n")
+    return buf.getvalue()
+
+
+def format_markdown_v2_parts(
+    title: str,
+    statuses: Dict[str, NodeStatus],
+    *,
+    minutes: int,
+    show_protocol: bool,
+    now: Optional[datetime] = None,
+    fingerprint: Optional[tuple] = None,
+    minute_text: Optional[str] = None,
+) -> Tuple[List[str], int]:
+    """Like `format_markdown_v2`, but return the unjoined parts and their hash.
+
+    The hash equals `payload_hash(render(parts))`; it is extended from the cached
+    body's digest state, so only the "Updated" line is encoded per call. Callers
+    that only need to dedupe can compare the digest and skip `render`.
+    Pass `fingerprint` if `status_fingerprint(statuses)` was already computed, and
+    `minute_text` if `minute_stamp(now)` is cached for the current minute.
+    """
+    now = now or datetime.now(timezone.utc)
+    if fingerprint is None:
+        fingerprint = status_fingerprint(statuses)
+    key = (title, minutes, show_protocol, fingerprint)
+    cached = _FMT_CACHE.get(key)
+    if cached is None:
+        body = _format_body(title, statuses, minutes=minutes, show_protocol=show_protocol)
+        cached = (body, _new_hasher(body.encode("utf-8")))
+        if len(_FMT_CACHE) >= _FMT_CACHE_MAX:
+            _FMT_CACHE.pop(next(iter(_FMT_CACHE)))
+        _FMT_CACHE[key] = cached
+    body, body_hash = cached
 
-    lines.append("")
     # _Updated: 2025-...Z_
-    ts = now.strftime("%Y-%m-%d %H:%M:%SZ")
-    upd = escape_markdown(f"Updated: {ts}", version=2)
-    lines.append(f"_{upd}_")
+    ts = f"{minute_text or minute_stamp(now)}:{now.second:02d}Z"
+    upd = f"_{_UPD_PREFIX}{ts}_"
+    h = body_hash.copy()
+    h.update(upd.encode("utf-8"))
+    return [body, upd], _intdigest(h)
 
-    return "\n".join(lines)
 
+def minute_stamp(now: datetime) -> str:
+    """MarkdownV2-escaped `YYYY-MM-DD HH:MM` part of the "Updated" line."""
+    # Digits, ":" and "Z" need no escaping, "-" does
+    return f"{now.year:04d}\\-{now.month:02d}\\-{now.day:02d} {now.hour:02d}:{now.minute:02d}"
 
-def payload_hash(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
+def render(parts: List[str]) -> str:
+    return "".join(parts)
 
-def _format_cn_datetime(now: datetime) -> str:
-    """Return Chinese-style datetime like 2025/9/2 上午12:59:05 (local-time-like in UTC)."""
+
+def format_markdown_v2(
+    title: str,
+    statuses: Dict[str, NodeStatus],
+    *,
+    minutes: int,
+    show_protocol: bool,
+    now: Optional[datetime] = None,
+) -> str:
+    """Create a compact, stable-ordered MarkdownV2 message."""
+    parts, _ = format_markdown_v2_parts(
+        title, statuses, minutes=minutes, show_protocol=show_protocol, now=now
+    )
+    return render(parts)
+
+
+def _new_hasher(data: bytes = b"") -> Hasher:
+    # Only used to detect changes, so a non-cryptographic hash is enough
+    if xxhash is not None:
+        return xxhash.xxh3_64(data)
+    return hashlib.sha256(data)
+
+
+def _intdigest(h: Hasher) -> int:
+    if xxhash is not None:
+        return h.intdigest()
+    # Truncate SHA-256 to 64 bits so both backends produce comparable ints
+    return int.from_bytes(h.digest()[:8], "big")
+
+
+def payload_hash(text: str) -> int:
+    data = text.encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return _intdigest(hashlib.sha256(data))
+
+
+def minute_stamp_cn(now: datetime) -> str:
+    """Minute part of `_format_cn_datetime`, e.g. 2025/9/2 上午12:59."""
     # Use UTC provided in callers; adapt to 12h with CN markers.
-    y = now.year
-    m = now.month
-    d = now.day
-    hour24 = now.hour
-    minute = now.minute
-    second = now.second
-    am = hour24 < 12
     # 12-hour clock: 0 -> 12 AM, 13 -> 1 PM
-    hour12 = hour24 % 12
-    if hour12 == 0:
-        hour12 = 12
-    meridian = "上午" if am else "下午"
-    return f"{y}/{m}/{d} {meridian}{hour12:02d}:{minute:02d}:{second:02d}"
+    half, hour12 = divmod(now.hour, 12)
+    meridian = (_AM, _PM)[half]
+    return f"{now.year}/{now.month}/{now.day} {meridian}{(hour12 or 12):02d}:{now.minute:02d}"
+
+
+def _format_cn_datetime(now: datetime, minute_text: Optional[str] = None) -> str:
+    """Return Chinese-style datetime like 2025/9/2 上午12:59:05 (local-time-like in UTC)."""
+    return f"{minute_text or minute_stamp_cn(now)}:{now.second:02d}"
 
 
 def format_board_zh(
@@ -181,6 +319,7 @@ def format_board_zh(
     now: datetime,
     domestic_alerts: list[str],
     foreign_alerts: list[str],
+    minute_text: Optional[str] = None,
 ) -> str:
     """Chinese board layout in MarkdownV2 with escaping.
 
@@ -197,32 +336,31 @@ def format_board_zh(
     如何解读：只要国内国外其中有一个报警即为节点不可用
     """
     lines: list[str] = []
-    title = escape_markdown("监视公告牌", version=2)
-    lines.append(title)
-    cn_dt = _format_cn_datetime(now)
-    lines.append(escape_markdown(f"更新日期：{cn_dt}", version=2))
+    lines.append(_CN_TITLE)
+    cn_dt = _format_cn_datetime(now, minute_text)
+    lines.append(_CN_UPDATED_PREFIX + _esc(cn_dt))
 
     # Domestic section
     lines.append("")
-    lines.append(escape_markdown("国内当前报警节点如下：", version=2))
+    lines.append(_CN_DOMESTIC_HEADER)
     if domestic_alerts:
         for n in sorted(domestic_alerts, key=lambda s: s.lower()):
-            name = escape_markdown(n, version=2)
+            name = _esc(n)
             lines.append(f"❌ {name}")
     else:
-        lines.append(escape_markdown("无", version=2))
+        lines.append(_CN_NONE)
 
     # Foreign section
     lines.append("")
-    lines.append(escape_markdown("国外当前报警节点如下：", version=2))
+    lines.append(_CN_FOREIGN_HEADER)
     if foreign_alerts:
         for n in sorted(foreign_alerts, key=lambda s: s.lower()):
-            name = escape_markdown(n, version=2)
+            name = _esc(n)
             lines.append(f"❌ {name}")
     else:
-        lines.append(escape_markdown("无", version=2))
+        lines.append(_CN_NONE)
 
     # Interpretation note
-    lines.append(escape_markdown("如何解读：只要国内国外其中有一个报警即为节点不可用", version=2))
+    lines.append(_CN_NOTE)
 
     return "\n".join(lines)
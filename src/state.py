@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -12,12 +13,16 @@ STATE_DIR = Path("data")
 STATE_FILE = STATE_DIR / "state.json"
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageRef:
     chat_id: int
     message_id: int
 
 
+# Last ref written to (or read from) STATE_FILE; lets repeated saves skip the disk
+_last_persisted: Optional[MessageRef] = None
+
+
 def ensure_state_dir() -> None:
     try:
         STATE_DIR.mkdir(parents=True, exist_ok=True)
@@ -26,16 +31,31 @@ def ensure_state_dir() -> None:
 
 
 def save_message_ref(ref: MessageRef) -> None:
+    global _last_persisted
+    if ref == _last_persisted:
+        return
     ensure_state_dir()
+    data = json.dumps(
+        {"chat_id": ref.chat_id, "message_id": ref.message_id}, separators=(",", ":")
+    ).encode("utf-8")
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
     try:
-        with STATE_FILE.open("w", encoding="utf-8") as f:
-            json.dump({"chat_id": ref.chat_id, "message_id": ref.message_id}, f)
+        # Tiny payload: one raw write, fsync, then atomically replace the old file
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, STATE_FILE)
+        _last_persisted = ref
         logger.info("Persisted message ref to %s", STATE_FILE)
     except Exception as e:
         logger.error("Failed to persist message ref: %s", e)
 
 
 def load_message_ref() -> Optional[MessageRef]:
+    global _last_persisted
     try:
         if not STATE_FILE.exists():
             return None
@@ -43,7 +63,9 @@ def load_message_ref() -> Optional[MessageRef]:
             data = json.load(f)
         chat_id = int(data.get("chat_id"))
         message_id = int(data.get("message_id"))
-        return MessageRef(chat_id=chat_id, message_id=message_id)
+        ref = MessageRef(chat_id=chat_id, message_id=message_id)
+        _last_persisted = ref
+        return ref
     except Exception as e:
         logger.warning("No valid state found at %s: %s", STATE_FILE, e)
         return None
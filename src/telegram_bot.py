@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from dataclasses import dataclass
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
-from telegram import Message, Update
+from influxdb_client import InfluxDBClient
+from telegram import Bot, Message, Update
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter
 from telegram.ext import (
     Application,
     CallbackContext,
@@ -17,12 +23,18 @@ from telegram.ext import (
 )
 
 from .config import Config
-from .influx import fetch_probe_window
+from .influx import create_client, fetch_probe_window, fetch_probe_window_multi
 from .reducer import (
-    format_markdown_v2,
+    NodeStatus,
+    format_markdown_v2_parts,
     payload_hash,
+    reduce_input_key,
     reduce_status,
     format_board_zh,
+    minute_stamp,
+    minute_stamp_cn,
+    render,
+    status_fingerprint,
 )
 from .state import MessageRef, load_message_ref, save_message_ref
 
@@ -30,17 +42,97 @@ from .state import MessageRef, load_message_ref, save_message_ref
 logger = logging.getLogger(__name__)
 
 
+# Minimum spacing between two edits, to stay clear of Telegram's rate limits
+MIN_EDIT_INTERVAL_SECONDS = 0.25
+# How long edit_worker waits after a wake-up so bursts collapse into one edit
+EDIT_BATCH_WINDOW_SECONDS = 0.5
+# Threads for blocking Influx queries; board_zh runs two fetches at once
+PROBE_POOL_WORKERS = 4
+# Edit retries: exponential backoff base, plus jitter on top of a 429 Retry-After
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_JITTER_SECONDS = 0.25
+# Bot API timeouts for the edit/send request; ApplicationBuilder's default
+# 256-connection pool is left as is (getUpdates keeps its own request)
+TELEGRAM_CONNECT_TIMEOUT_SECONDS = 5.0
+TELEGRAM_READ_TIMEOUT_SECONDS = 10.0
+
+
+@dataclass
+class PendingEdit:
+    ref: MessageRef
+    text: str
+    payload_hash: int
+    board_key: Optional[tuple]
+
+
 @dataclass
 class BotState:
     msg_ref: Optional[MessageRef]
-    last_hash: Optional[str] = None
+    # Long-lived Influx client, created by build_application and closed on shutdown
+    influx_client: Optional[InfluxDBClient] = None
+    # Dedicated threads for the blocking Influx queries, shut down with the client
+    probe_pool: Optional[ThreadPoolExecutor] = None
+    last_hash: Optional[int] = None  # 64-bit digest from reducer.payload_hash (xxh3_64 or sha256)
+    # ((domestic, foreign) alert sets, minute bucket) behind the last board_zh edit
+    last_board_key: Optional[tuple] = None
+    # reduce_input_key / status_fingerprint of the last default-board cycle
+    last_input_key: Optional[tuple] = None
+    last_fp: Optional[tuple] = None
+    # Reduced statuses from the previous cycle, updated in place by reduce_status
+    statuses: Dict[str, NodeStatus] = field(default_factory=dict)
+    dom_statuses: Dict[str, NodeStatus] = field(default_factory=dict)
+    for_statuses: Dict[str, NodeStatus] = field(default_factory=dict)
+    # What the last cycle displayed (minus timestamps) and how many cycles in a
+    # row it stayed the same; drives the poll backoff in main.next_poll_delay
+    last_content_key: Optional[tuple] = None
+    unchanged_streak: int = 0
+    # (minute bucket, minute_stamp text) so timestamps are formatted once a minute
+    ts_cache: Optional[Tuple[datetime, str]] = None
+    # Edits are batched through edit_worker: single-slot mailbox, wake-up event,
+    # the worker task itself, and the time of the last edit attempt
+    pending_edit: Optional[PendingEdit] = None
+    pending_event: asyncio.Event = field(default_factory=asyncio.Event)
+    edit_task: Optional[asyncio.Task] = None
+    last_edit_monotonic: float = 0.0
+
+
+def build_application(cfg: Config, state: BotState) -> Application:
+    # One Influx client (and HTTP connection pool) for the lifetime of the app
+    if state.influx_client is None:
+        state.influx_client = create_client(cfg.influx_url, cfg.influx_token, cfg.influx_org)
+    # Persisted message ref is read once here; /init_status keeps it current
+    if state.msg_ref is None:
+        state.msg_ref = load_message_ref()
+    if state.probe_pool is None:
+        state.probe_pool = ThreadPoolExecutor(
+            max_workers=PROBE_POOL_WORKERS, thread_name_prefix="probe"
+        )
 
+    async def start_edit_worker(application: Application) -> None:
+        state.edit_task = asyncio.create_task(edit_worker(state, application.bot))
+
+    async def stop_edit_worker(_: Application) -> None:
+        if state.edit_task is not None:
+            state.edit_task.cancel()
+            state.edit_task = None
+
+    async def close_influx(_: Application) -> None:
+        if state.probe_pool is not None:
+            state.probe_pool.shutdown(wait=False, cancel_futures=True)
+            state.probe_pool = None
+        if state.influx_client is not None:
+            state.influx_client.close()
+            state.influx_client = None
 
-def build_application(cfg: Config) -> Application:
     app = (
         Application.builder()
         .token(cfg.telegram_bot_token)
+        .connect_timeout(TELEGRAM_CONNECT_TIMEOUT_SECONDS)
+        .read_timeout(TELEGRAM_READ_TIMEOUT_SECONDS)
         .defaults(Defaults(parse_mode=ParseMode.MARKDOWN_V2))
+        .post_init(start_edit_worker)
+        .post_stop(stop_edit_worker)
+        .post_shutdown(close_influx)
         .build()
     )
 
@@ -75,6 +167,7 @@ def build_application(cfg: Config) -> Application:
             return
 
         ref = MessageRef(chat_id=sent.chat_id, message_id=sent.message_id)
+        state.msg_ref = ref
         save_message_ref(ref)
         await update.effective_message.reply_text("Status message initialized and saved.")
 
@@ -88,71 +181,121 @@ async def update_cycle(
 ) -> None:
     """One cycle: fetch → reduce → format → edit if changed."""
     now = datetime.now(timezone.utc)
+    # Blocking Influx queries run on state.probe_pool to keep the event loop free
+    loop = asyncio.get_running_loop()
+    query = dict(
+        client=state.influx_client,
+        org=cfg.influx_org,
+        bucket=cfg.influx_bucket,
+        minutes=cfg.time_range_minutes,
+        use_dataframe=cfg.influx_use_pandas,
+    )
+    fetch = functools.partial(fetch_probe_window, **query)
     try:
         if cfg.status_template == "board_zh":
-            # Domestic vantage
-            dom_data = fetch_probe_window(
-                url=cfg.influx_url,
-                token=cfg.influx_token,
-                org=cfg.influx_org,
-                bucket=cfg.influx_bucket,
-                minutes=cfg.time_range_minutes,
-                probe_node=cfg.domestic_probe_node,
-            )
+            dom_node, for_node = cfg.domestic_probe_node, cfg.foreign_probe_node
+            if dom_node and for_node:
+                # Both vantages in one Flux query, split by node client-side
+                by_node = await loop.run_in_executor(
+                    state.probe_pool,
+                    functools.partial(
+                        fetch_probe_window_multi, probe_nodes=(dom_node, for_node), **query
+                    ),
+                )
+                dom_data, for_data = by_node[dom_node], by_node[for_node]
+            elif for_node:
+                # Unfiltered domestic view can't share a node-split query; run both at once
+                dom_data, for_data = await asyncio.gather(
+                    loop.run_in_executor(state.probe_pool, fetch),
+                    loop.run_in_executor(
+                        state.probe_pool, functools.partial(fetch, probe_node=for_node)
+                    ),
+                )
+            else:
+                dom_data = await loop.run_in_executor(
+                    state.probe_pool, functools.partial(fetch, probe_node=dom_node)
+                )
+                for_data = None
+
             dom_status = reduce_status(
                 dom_data,
+                prev=state.dom_statuses,
                 minutes=cfg.time_range_minutes,
                 latency_warn_ms=cfg.latency_warn_ms,
             )
             # Foreign vantage (optional)
-            if cfg.foreign_probe_node:
-                for_data = fetch_probe_window(
-                    url=cfg.influx_url,
-                    token=cfg.influx_token,
-                    org=cfg.influx_org,
-                    bucket=cfg.influx_bucket,
-                    minutes=cfg.time_range_minutes,
-                    probe_node=cfg.foreign_probe_node,
-                )
+            if for_data is not None:
                 for_status = reduce_status(
                     for_data,
+                    prev=state.for_statuses,
                     minutes=cfg.time_range_minutes,
                     latency_warn_ms=cfg.latency_warn_ms,
                 )
             else:
                 for_status = {}
 
-            def is_alert(ns) -> bool:
-                return (not ns.up) or (cfg.include_degraded_as_alert and ns.degraded)
+            # Alert = down, or degraded when configured; inlined to avoid a call per node
+            deg_alert = cfg.include_degraded_as_alert
+            domestic_alerts = [
+                s.name for s in dom_status.values() if (not s.up) or (deg_alert and s.degraded)
+            ]
+            foreign_alerts = [
+                s.name for s in for_status.values() if (not s.up) or (deg_alert and s.degraded)
+            ]
 
-            domestic_alerts = [s.name for s in dom_status.values() if is_alert(s)]
-            foreign_alerts = [s.name for s in for_status.values() if is_alert(s)]
+            # The board only shows the alert sets and the time, so compare those
+            # directly and skip formatting and hashing when they match the last edit.
+            alert_key = (frozenset(domestic_alerts), frozenset(foreign_alerts))
+            _track_changes(state, alert_key)
+            board_key = (alert_key, now.replace(second=0, microsecond=0))
+            if board_key == state.last_board_key:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("No change; skipping edit.")
+                return
 
             text = format_board_zh(
                 now=now,
                 domestic_alerts=domestic_alerts,
                 foreign_alerts=foreign_alerts,
+                minute_text=_minute_text(state, now, minute_stamp_cn),
             )
+            parts = [text]
+            h = payload_hash(text)
         else:
+            board_key = None
             # Default compact list
-            data = fetch_probe_window(
-                url=cfg.influx_url,
-                token=cfg.influx_token,
-                org=cfg.influx_org,
-                bucket=cfg.influx_bucket,
-                minutes=cfg.time_range_minutes,
-            )
-            statuses = reduce_status(
+            data = await loop.run_in_executor(state.probe_pool, fetch)
+            # Same reduction inputs as last cycle => state.statuses and last_fp are
+            # still current, so skip reducing and fingerprinting.
+            input_key = reduce_input_key(
                 data, minutes=cfg.time_range_minutes, latency_warn_ms=cfg.latency_warn_ms
             )
-            text = format_markdown_v2(
+            if input_key == state.last_input_key:
+                statuses = state.statuses
+                fp = state.last_fp
+                logger.debug("Probe data unchanged; reusing reduced statuses.")
+            else:
+                statuses = reduce_status(
+                    data,
+                    prev=state.statuses,
+                    minutes=cfg.time_range_minutes,
+                    latency_warn_ms=cfg.latency_warn_ms,
+                )
+                fp = status_fingerprint(statuses)
+                state.last_input_key = input_key
+                state.last_fp = fp
+            _track_changes(state, fp)
+            # The formatter serves the cached body for a known fingerprint; hash
+            # incrementally and only join the parts if we actually edit
+            parts, h = format_markdown_v2_parts(
                 cfg.status_title,
                 statuses,
                 minutes=cfg.time_range_minutes,
                 show_protocol=cfg.show_protocol,
                 now=now,
+                fingerprint=fp,
+                minute_text=_minute_text(state, now, minute_stamp),
             )
-        h = payload_hash(text)
 
         # Determine message ref precedence: explicit in env, else persisted
         ref = state.msg_ref
@@ -161,11 +304,6 @@ async def update_cycle(
                 chat_id=cfg.telegram_chat_id, message_id=cfg.telegram_message_id
             )
 
-        if ref is None:
-            # Try load from disk (in case not loaded yet)
-            ref = load_message_ref()
-            state.msg_ref = ref
-
         if ref is None:
             logger.info(
                 "No target message configured. Run /init_status in your group or set "
@@ -175,29 +313,89 @@ async def update_cycle(
 
         # Avoid redundant edits
         if state.last_hash == h:
-            logger.info("No change; skipping edit.")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("No change; skipping edit.")
             return
 
-        # Try editing with basic retry
-        tries = 3
-        for attempt in range(1, tries + 1):
-            try:
-                await context.bot.edit_message_text(
-                    chat_id=ref.chat_id,
-                    message_id=ref.message_id,
-                    text=text,
-                    parse_mode=ParseMode.MARKDOWN_V2,
-                    disable_web_page_preview=True,
-                )
-                state.last_hash = h
-                logger.info("Edited status message (chat=%s, msg=%s)", ref.chat_id, ref.message_id)
-                break
-            except Exception as e:
-                if attempt == tries:
-                    logger.error("Failed to edit message after %s attempts: %s", attempt, e)
-                else:
-                    logger.warning("Edit failed (attempt %s/%s): %s", attempt, tries, e)
-                    await asyncio.sleep(1.0 * attempt)
+        # Hand off to edit_worker; the newest payload wins within a batch window
+        state.pending_edit = PendingEdit(ref=ref, text=render(parts), payload_hash=h, board_key=board_key)
+        state.pending_event.set()
 
     except Exception as e:
         logger.error("Update cycle error: %s", e)
+
+
+def _minute_text(state: BotState, now: datetime, stamp: Callable[[datetime], str]) -> str:
+    bucket = now.replace(second=0, microsecond=0)
+    cached = state.ts_cache
+    if cached is None or cached[0] != bucket:
+        cached = state.ts_cache = (bucket, stamp(bucket))
+    return cached[1]
+
+
+def _track_changes(state: BotState, content_key: tuple) -> None:
+    if content_key == state.last_content_key:
+        state.unchanged_streak += 1
+    else:
+        state.last_content_key = content_key
+        state.unchanged_streak = 0
+
+
+async def edit_worker(state: BotState, bot: Bot) -> None:
+    """Long-running task that drains `state.pending_edit`, one edit per batch window."""
+    while True:
+        await state.pending_event.wait()
+        # Let rapid successive cycles overwrite the slot before we send
+        await asyncio.sleep(EDIT_BATCH_WINDOW_SECONDS)
+        state.pending_event.clear()
+        try:
+            await _flush_edit(state, bot)
+        except Exception as e:
+            logger.error("Edit worker error: %s", e)
+
+
+async def _flush_edit(state: BotState, bot: Bot) -> None:
+    """Send the latest pending edit, spaced by MIN_EDIT_INTERVAL_SECONDS."""
+    pending = state.pending_edit
+    state.pending_edit = None
+    if pending is None or state.last_hash == pending.payload_hash:
+        return
+
+    wait = MIN_EDIT_INTERVAL_SECONDS - (time.monotonic() - state.last_edit_monotonic)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    ref = pending.ref
+    # Try editing with retry: honour Telegram's Retry-After on 429, otherwise
+    # back off exponentially (network errors, timeouts, anything unexpected)
+    tries = 3
+    for attempt in range(1, tries + 1):
+        try:
+            await bot.edit_message_text(
+                chat_id=ref.chat_id,
+                message_id=ref.message_id,
+                text=pending.text,
+                parse_mode=ParseMode.MARKDOWN_V2,
+                disable_web_page_preview=True,
+            )
+            state.last_hash = pending.payload_hash
+            state.last_board_key = pending.board_key
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Edited status message (chat=%s, msg=%s)", ref.chat_id, ref.message_id
+                )
+            break
+        except Exception as e:
+            if attempt == tries:
+                logger.error("Failed to edit message after %s attempts: %s", attempt, e)
+                break
+            if isinstance(e, RetryAfter):
+                delay = e.retry_after + random.uniform(0, RETRY_JITTER_SECONDS)
+            else:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(
+                "Edit failed (attempt %s/%s): %s; retrying in %.2fs", attempt, tries, e, delay
+            )
+            await asyncio.sleep(delay)
+        finally:
+            state.last_edit_monotonic = time.monotonic()
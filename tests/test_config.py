@@ -0,0 +1,31 @@
+import pytest
+
+from src.config import load_config
+
+
+REQUIRED = {
+    "INFLUX_URL": "http://localhost:8086",
+    "INFLUX_TOKEN": "token",
+    "INFLUX_ORG": "org",
+    "TELEGRAM_BOT_TOKEN": "bot-token",
+}
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for k, v in REQUIRED.items():
+        monkeypatch.setenv(k, v)
+    load_config.cache_clear()
+    yield monkeypatch
+    load_config.cache_clear()
+
+
+def test_load_config_is_cached(env):
+    cfg = load_config()
+    assert cfg.influx_bucket == "clashprobe"
+
+    env.setenv("INFLUX_BUCKET", "other")
+    assert load_config() is cfg
+
+    load_config.cache_clear()
+    assert load_config().influx_bucket == "other"
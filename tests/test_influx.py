@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from influxdb_client.client.flux_table import FluxRecord
+
+from src.influx import fetch_probe_window, fetch_probe_window_multi
+
+
+T = datetime(2025, 9, 2, 0, 59, tzinfo=timezone.utc)
+
+
+def record(node, name, field, value):
+    return FluxRecord(
+        table=0,
+        values={"node": node, "name": name, "_field": field, "_value": value, "_time": T},
+    )
+
+
+class FakeQueryApi:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def query_stream(self, query, org):
+        self.queries.append(query)
+        return iter(self.records)
+
+    def query_data_frame(self, query, org):
+        self.queries.append(query)
+        return self.records
+
+
+class FakeClient:
+    def __init__(self, records):
+        self.api = FakeQueryApi(records)
+
+    def query_api(self):
+        return self.api
+
+
+def test_fetch_probe_window_multi_splits_one_query_by_node():
+    client = FakeClient(
+        [
+            record("dom", "A", "alive", True),
+            record("dom", "A", "delay_ms", 42),
+            record("for", "A", "alive", False),
+            record("other", "B", "alive", True),
+        ]
+    )
+    results = fetch_probe_window_multi(
+        client=client, org="org", bucket="probes", minutes=5, probe_nodes=["dom", "for", "idle"]
+    )
+
+    assert len(client.api.queries) == 1
+    assert 'contains(value: r["node"], set: ["dom", "for", "idle"])' in client.api.queries[0]
+    assert set(results) == {"dom", "for", "idle"}
+    assert results["dom"]["A"].alive is True and results["dom"]["A"].latency_ms == 42
+    assert results["for"]["A"].alive is False
+    assert results["idle"] == {}
+
+
+def frames(pd):
+    """One frame per field, as query_data_frame returns them; each has an older duplicate."""
+    old = T - timedelta(minutes=3)
+
+    def frame(field, rows):
+        df = pd.DataFrame(rows, columns=["node", "name", "_value", "_time", "protocol"])
+        df["_field"] = field
+        df["_time"] = pd.to_datetime(df["_time"], utc=True)
+        return df
+
+    alive = frame(
+        "alive",
+        [
+            ("dom", "A", True, T, "ss"),
+            ("dom", "A", False, old, "ss"),
+            ("for", "A", False, T, None),
+            ("for", "A", True, old, None),
+        ],
+    )
+    delay = frame(
+        "delay_ms",
+        [
+            ("dom", "A", 40.0, old, None),
+            ("dom", "A", 42.0, T, None),
+        ],
+    )
+    return [alive, delay]
+
+
+def test_fetch_probe_window_dataframe_keeps_latest_row():
+    pd = pytest.importorskip("pandas")
+    dom_only = [f[f["node"] == "dom"].drop(columns="node") for f in frames(pd)]
+    client = FakeClient(dom_only)
+
+    result = fetch_probe_window(
+        client=client, org="org", bucket="probes", minutes=5, probe_node="dom", use_dataframe=True
+    )
+
+    a = result["A"]
+    assert (a.alive, a.latency_ms, a.protocol) == (True, 42, "ss")
+    assert a.alive_time == T and a.latency_time == T
+
+
+def test_fetch_probe_window_multi_dataframe_splits_and_keeps_latest_row():
+    pd = pytest.importorskip("pandas")
+    client = FakeClient(frames(pd))
+
+    results = fetch_probe_window_multi(
+        client=client,
+        org="org",
+        bucket="probes",
+        minutes=5,
+        probe_nodes=["dom", "for"],
+        use_dataframe=True,
+    )
+
+    dom, foreign = results["dom"]["A"], results["for"]["A"]
+    assert (dom.alive, dom.latency_ms, dom.protocol) == (True, 42, "ss")
+    assert (foreign.alive, foreign.latency_ms, foreign.protocol) == (False, None, None)
+    assert foreign.alive_time == T
@@ -0,0 +1,29 @@
+from src.config import Config
+from src.main import MIN_POLL_INTERVAL_SECONDS, next_poll_delay
+from src.telegram_bot import BotState
+
+
+def make_cfg(interval: int, max_interval: int) -> Config:
+    return Config(
+        influx_url="http://localhost:8086",
+        influx_token="token",
+        influx_org="org",
+        poll_interval_seconds=interval,
+        poll_max_interval_seconds=max_interval,
+    )
+
+
+def test_next_poll_delay_backs_off_while_unchanged():
+    cfg = make_cfg(30, 200)
+    state = BotState(msg_ref=None)
+    delays = []
+    for streak in range(5):
+        state.unchanged_streak = streak
+        delays.append(next_poll_delay(cfg, state))
+    assert delays == [30, 60, 120, 200, 200]
+
+
+def test_next_poll_delay_defaults_to_fixed_interval_with_floor():
+    state = BotState(msg_ref=None, unchanged_streak=3)
+    assert next_poll_delay(make_cfg(30, 30), state) == 30
+    assert next_poll_delay(make_cfg(1, 1), state) == MIN_POLL_INTERVAL_SECONDS
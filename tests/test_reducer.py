@@ -1,7 +1,22 @@
 from datetime import datetime, timezone, timedelta
 
+import pytest
+from telegram.helpers import escape_markdown
+
+from src import reducer
 from src.influx import NodePoint
-from src.reducer import reduce_status, format_markdown_v2
+from src.reducer import (
+    _esc,
+    format_board_zh,
+    format_markdown_v2,
+    format_markdown_v2_parts,
+    minute_stamp,
+    minute_stamp_cn,
+    payload_hash,
+    reduce_input_key,
+    reduce_status,
+    render,
+)
 
 
 def make_dt(minutes_ago: int) -> datetime:
@@ -52,3 +67,81 @@ def test_format_markdown_v2_ordering():
     assert -1 not in {bpos, cpos, apos}
     assert bpos < cpos < apos
 
+
+def test_format_markdown_v2_cached_body_refreshes_timestamp():
+    data = {
+        "A": NodePoint(alive=True, latency_ms=50, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None),
+    }
+    statuses = reduce_status(data, minutes=5, latency_warn_ms=None)
+    t1 = datetime(2025, 9, 7, 16, 15, 3, tzinfo=timezone.utc)
+    t2 = t1 + timedelta(seconds=30)
+    first = format_markdown_v2("Network Status", statuses, minutes=5, show_protocol=True, now=t1)
+    second = format_markdown_v2("Network Status", statuses, minutes=5, show_protocol=True, now=t2)
+    assert first.endswith("16:15:03Z_")
+    assert second.endswith("16:15:33Z_")
+    assert first.rsplit("\n", 1)[0] == second.rsplit("\n", 1)[0]
+
+
+def test_esc_matches_escape_markdown_v2():
+    sample = "a_b*c[d]e(f)g~h`i>j#k+l-m=n|o{p}q.r!s\\t — 82 ms 国内"
+    assert _esc(sample) == escape_markdown(sample, version=2)
+
+
+@pytest.mark.parametrize("use_xxhash", [True, False])
+def test_format_markdown_v2_parts_hash_matches_payload_hash(monkeypatch, use_xxhash):
+    if not use_xxhash:
+        monkeypatch.setattr(reducer, "xxhash", None)
+        reducer._FMT_CACHE.clear()
+    data = {
+        "A": NodePoint(alive=True, latency_ms=50, alive_time=make_dt(1), latency_time=make_dt(1), protocol="vmess"),
+        "B": NodePoint(alive=False, latency_ms=None, alive_time=make_dt(1), latency_time=None, protocol=None),
+    }
+    statuses = reduce_status(data, minutes=5, latency_warn_ms=None)
+    for _ in range(2):  # cold and warm cache
+        parts, h = format_markdown_v2_parts("Network Status", statuses, minutes=5, show_protocol=True)
+        assert h == payload_hash(render(parts))
+    reducer._FMT_CACHE.clear()
+
+
+def test_reduce_status_updates_prev_in_place():
+    data = {
+        "A": NodePoint(alive=True, latency_ms=50, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None),
+        "B": NodePoint(alive=True, latency_ms=60, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None),
+    }
+    prev = reduce_status(data, minutes=5, latency_warn_ms=None)
+    a_status = prev["A"]
+
+    data = {
+        "A": NodePoint(alive=False, latency_ms=None, alive_time=make_dt(1), latency_time=None, protocol=None),
+        "C": NodePoint(alive=True, latency_ms=70, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None),
+    }
+    statuses = reduce_status(data, prev=prev, minutes=5, latency_warn_ms=None)
+
+    assert statuses is prev
+    assert statuses["A"] is a_status
+    assert a_status.up is False and a_status.latency_ms is None
+    assert set(statuses) == {"A", "C"}
+
+
+def test_reduce_input_key_ignores_timestamps_only():
+    base = NodePoint(alive=True, latency_ms=50, alive_time=make_dt(2), latency_time=make_dt(2), protocol=None)
+    later = NodePoint(alive=True, latency_ms=50, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None)
+    slower = NodePoint(alive=True, latency_ms=90, alive_time=make_dt(1), latency_time=make_dt(1), protocol=None)
+
+    def key(node):
+        return reduce_input_key({"A": node}, minutes=5, latency_warn_ms=None)
+
+    assert key(base) == key(later)
+    assert key(base) != key(slower)
+
+
+def test_cached_minute_text_matches_fresh_timestamp():
+    statuses = reduce_status({}, minutes=5, latency_warn_ms=None)
+    t = datetime(2025, 9, 2, 13, 59, 5, tzinfo=timezone.utc)
+    bucket = t.replace(second=0)
+    assert format_markdown_v2_parts(
+        "Network Status", statuses, minutes=5, show_protocol=True, now=t, minute_text=minute_stamp(bucket)
+    ) == format_markdown_v2_parts("Network Status", statuses, minutes=5, show_protocol=True, now=t)
+    board = format_board_zh(now=t, domestic_alerts=[], foreign_alerts=[], minute_text=minute_stamp_cn(bucket))
+    assert board == format_board_zh(now=t, domestic_alerts=[], foreign_alerts=[])
+    assert "下午01:59:05" in board
@@ -0,0 +1,28 @@
+import pytest
+
+from src import state
+from src.state import MessageRef, load_message_ref, save_message_ref
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(state, "STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(state, "_last_persisted", None)
+    return tmp_path / "state.json"
+
+
+def test_save_and_load_roundtrip(state_file):
+    save_message_ref(MessageRef(chat_id=-100, message_id=42))
+    assert state_file.read_text() == '{"chat_id":-100,"message_id":42}'
+    assert not state_file.with_name("state.json.tmp").exists()
+    assert load_message_ref() == MessageRef(chat_id=-100, message_id=42)
+
+
+def test_save_skips_unchanged_ref(state_file):
+    save_message_ref(MessageRef(chat_id=1, message_id=2))
+    state_file.unlink()
+    save_message_ref(MessageRef(chat_id=1, message_id=2))
+    assert not state_file.exists()
+    save_message_ref(MessageRef(chat_id=1, message_id=3))
+    assert load_message_ref() == MessageRef(chat_id=1, message_id=3)
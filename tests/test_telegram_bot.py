@@ -0,0 +1,58 @@
+import asyncio
+
+from telegram.error import RetryAfter, TimedOut
+
+from src import telegram_bot as tb
+from src.config import Config
+from src.state import MessageRef
+
+
+class FlakyBot:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.edits = 0
+
+    async def edit_message_text(self, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.edits += 1
+
+
+def test_flush_edit_honours_retry_after_then_backs_off(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(tb.asyncio, "sleep", fake_sleep)
+    state = tb.BotState(msg_ref=None)
+    state.pending_edit = tb.PendingEdit(
+        ref=MessageRef(chat_id=1, message_id=2), text="x", payload_hash=7, board_key=None
+    )
+    bot = FlakyBot([RetryAfter(3), TimedOut()])
+
+    asyncio.run(tb._flush_edit(state, bot))
+
+    assert bot.edits == 1
+    assert state.last_hash == 7
+    assert 3 <= sleeps[0] <= 3 + tb.RETRY_JITTER_SECONDS
+    assert sleeps[1] == tb.RETRY_BACKOFF_SECONDS * 4
+
+
+def test_build_application_keeps_default_api_pool_with_custom_timeouts():
+    cfg = Config(
+        influx_url="http://localhost:8086",
+        influx_token="token",
+        influx_org="org",
+        telegram_bot_token="123:abc",
+    )
+    state = tb.BotState(msg_ref=None)
+    app = tb.build_application(cfg, state)
+    state.probe_pool.shutdown()
+    state.influx_client.close()
+
+    # bot._request is (get_updates request, general API request)
+    kwargs = app.bot._request[1]._client_kwargs
+    assert kwargs["limits"].max_connections >= 256
+    assert kwargs["timeout"].connect == tb.TELEGRAM_CONNECT_TIMEOUT_SECONDS
+    assert kwargs["timeout"].read == tb.TELEGRAM_READ_TIMEOUT_SECONDS